@@ -1,25 +1,97 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, UploadFile, File, Form
 from dotenv import load_dotenv
+from fastapi.responses import ORJSONResponse, Response
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.middleware.gzip import GZipMiddleware
+from pymongo import AsyncMongoClient, ReturnDocument, UpdateOne, ReplaceOne, DeleteOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from gridfs import AsyncGridFSBucket
+from gridfs.errors import NoFile
+from bson import ObjectId
+from bson.errors import InvalidId
+import redis.asyncio as redis
+import orjson
+import hashlib
 import os
+import sys
+import asyncio
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, AliasChoices
 from typing import List, Optional
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+from base64 import b64decode, b64encode
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# Configure logging: handlers only enqueue records, a background thread writes them out
+log_queue = queue.SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_listener = QueueListener(log_queue, log_handler, respect_handler_level=True)
+root_logger = logging.getLogger()
+root_logger.handlers = [QueueHandler(log_queue)]
+root_logger.setLevel(logging.INFO)
+log_listener.start()
+logger = logging.getLogger(__name__)
+
+# MongoDB connection (the client is created once per process on startup)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
 
-# Create the main app without a prefix
-app = FastAPI()
+def get_db(request: Request):
+    """Dependency returning the shared database handle"""
+    return request.app.state.db
+
+def get_photo_bucket(request: Request):
+    """Dependency returning the GridFS bucket holding photo binaries"""
+    return request.app.state.photos
+
+# Redis cache for dashboard stats (disabled when REDIS_URL is not set)
+redis_url = os.environ.get('REDIS_URL')
+cache = redis.from_url(redis_url) if redis_url else None
+DASHBOARD_CACHE_TTL = 30  # seconds
+
+# Deprecated: inline base64 photos in JSON bodies; new clients upload multipart to /{id}/photos
+ALLOW_INLINE_PHOTOS = os.environ.get('ALLOW_INLINE_PHOTOS', 'true').lower() == 'true'
+PHOTO_UPLOAD_CHUNK_SIZE = 1 << 20
+PHOTO_UPDATE_ATTEMPTS = 3  # compare-and-set retries when a PUT races another photo write
+MAX_PHOTO_UPLOAD_BYTES = int(os.environ.get('MAX_PHOTO_UPLOAD_BYTES', 10 << 20))
+
+async def get_cached_dashboard_stats(key):
+    """Return cached dashboard stats, or None on a miss"""
+    if cache is None:
+        return None
+    try:
+        cached = await cache.get(key)
+        return orjson.loads(cached) if cached else None
+    except Exception as e:
+        logging.error("Error reading dashboard cache: %s", e)
+        return None
+
+async def set_cached_dashboard_stats(key, stats):
+    """Store dashboard stats in the cache for DASHBOARD_CACHE_TTL seconds"""
+    if cache is None:
+        return
+    try:
+        await cache.set(key, orjson.dumps(stats), ex=DASHBOARD_CACHE_TTL)
+    except Exception as e:
+        logging.error("Error writing dashboard cache: %s", e)
+
+async def invalidate_dashboard_cache(key):
+    """Drop cached dashboard stats after a write"""
+    if cache is None:
+        return
+    try:
+        await cache.delete(key)
+    except Exception as e:
+        logging.error("Error invalidating dashboard cache: %s", e)
+
+# Create the main app without a prefix; orjson serialises the large photo payloads much faster
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -27,13 +99,18 @@ api_router = APIRouter(prefix="/api")
 # Define Models for Material Inspection
 class PhotoData(BaseModel):
     id: str
-    base64: str
+    gridfs_id: Optional[str] = None
+    # Inline image data is only accepted on write (and filled in when expanding);
+    # it is moved to GridFS and never stored in the inspection document
+    base64: Optional[str] = None
     timestamp: str
     width: Optional[int] = None
     height: Optional[int] = None
+    content_type: str = "image/jpeg"
 
 class MaterialInspection(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    # Stored as the document _id; clients read and write it as "id"
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex, validation_alias=AliasChoices("id", "_id"))
     invoiceNumber: str
     materialType: str
     quantityReceived: Optional[str] = None
@@ -81,210 +158,557 @@ class SyncData(BaseModel):
     materials: List[MaterialInspection]
     lastSyncTimestamp: str
 
-# Material Inspection Routes
-@api_router.post("/material-inspections", response_model=MaterialInspection)
-async def create_material_inspection(material: MaterialInspectionCreate):
-    """Create a new material inspection"""
-    try:
-        material_dict = material.dict()
-        material_obj = MaterialInspection(**material_dict)
-        
-        result = await db.material_inspections.insert_one(material_obj.dict())
-        
-        if result.inserted_id:
-            return material_obj
-        else:
-            raise HTTPException(status_code=500, detail="Failed to create material inspection")
-    except Exception as e:
-        logging.error(f"Error creating material inspection: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+class BulkDeleteRequest(BaseModel):
+    ids: List[str]
 
-@api_router.get("/material-inspections", response_model=List[MaterialInspection])
-async def get_material_inspections(skip: int = 0, limit: int = 100):
-    """Get all material inspections with pagination"""
-    try:
-        cursor = db.material_inspections.find().skip(skip).limit(limit).sort("inspectionDate", -1)
-        materials = await cursor.to_list(length=limit)
-        return [MaterialInspection(**material) for material in materials]
-    except Exception as e:
-        logging.error(f"Error getting material inspections: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+def to_document(inspection):
+    """Dump an inspection for storage, keyed by its id as _id"""
+    document = inspection.model_dump(mode="python")
+    document["_id"] = document.pop("id")
+    return document
 
-@api_router.get("/material-inspections/{material_id}", response_model=MaterialInspection)
-async def get_material_inspection(material_id: str):
-    """Get a specific material inspection by ID"""
-    try:
-        material = await db.material_inspections.find_one({"id": material_id})
-        if not material:
-            raise HTTPException(status_code=404, detail="Material inspection not found")
-        return MaterialInspection(**material)
-    except HTTPException:
-        raise
-    except Exception as e:
-        logging.error(f"Error getting material inspection {material_id}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+MIGRATION_BATCH_SIZE = 500  # bulk_write ops per batch; legacy documents can embed MBs of photos
+LEGACY_IDS_MIGRATION = "legacy_ids"
 
-@api_router.put("/material-inspections/{material_id}", response_model=MaterialInspection)
-async def update_material_inspection(material_id: str, material_update: MaterialInspectionUpdate):
-    """Update a material inspection"""
+async def migrate_legacy_ids(collection):
+    """Re-key documents written before inspections used their id as _id
+    
+    Safe to re-run: only documents that still carry an "id" field are touched.
+    """
+    # The old unique index on "id" would see every re-keyed document as id: null,
+    # so the second one written would fail with E11000; drop it before rewriting anything
     try:
-        # First check if material exists
-        existing_material = await db.material_inspections.find_one({"id": material_id})
-        if not existing_material:
-            raise HTTPException(status_code=404, detail="Material inspection not found")
-        
-        # Update only provided fields
-        update_data = {k: v for k, v in material_update.dict().items() if v is not None}
-        update_data["lastModified"] = datetime.utcnow()
-        
-        result = await db.material_inspections.update_one(
-            {"id": material_id},
-            {"$set": update_data}
-        )
-        
-        if result.modified_count == 0:
-            raise HTTPException(status_code=404, detail="Material inspection not found")
-        
-        # Return updated material
-        updated_material = await db.material_inspections.find_one({"id": material_id})
-        return MaterialInspection(**updated_material)
-    except HTTPException:
-        raise
-    except Exception as e:
-        logging.error(f"Error updating material inspection {material_id}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        await collection.drop_index("id_1")
+    except OperationFailure:
+        pass  # Already dropped (or never created)
+    
+    operations = []
+    cursor = collection.find({"id": {"$exists": True}}, batch_size=MIGRATION_BATCH_SIZE // 2)
+    async for document in cursor:
+        legacy_object_id = document.pop("_id")
+        document["_id"] = document.pop("id")
+        operations.append(ReplaceOne({"_id": document["_id"]}, document, upsert=True))
+        operations.append(DeleteOne({"_id": legacy_object_id}))
+        if len(operations) >= MIGRATION_BATCH_SIZE:
+            await collection.bulk_write(operations, ordered=True)
+            operations = []
+    if operations:
+        await collection.bulk_write(operations, ordered=True)
 
-@api_router.delete("/material-inspections/{material_id}")
-async def delete_material_inspection(material_id: str):
-    """Delete a material inspection"""
+async def run_migration_once(db, name, migration):
+    """Run migration() unless some process already claimed it in the migrations collection
+    
+    Workers start together, so the claim is an insert on a fixed _id: exactly one wins.
+    A failed run releases its claim so the next startup retries it. A claim that never
+    gets a completedAt (the process died mid-run) is logged; `python server.py migrate`
+    re-runs it.
+    """
+    try:
+        await db.migrations.insert_one({"_id": name, "startedAt": datetime.utcnow()})
+    except DuplicateKeyError:
+        claim = await db.migrations.find_one({"_id": name})
+        if claim and not claim.get("completedAt"):
+            logger.warning(
+                "Migration %s was claimed at %s but never completed; it is either still running "
+                "in another worker or was interrupted (re-run with `python server.py migrate`)",
+                name, claim.get("startedAt")
+            )
+        return False
     try:
-        result = await db.material_inspections.delete_one({"id": material_id})
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Material inspection not found")
-        return {"message": "Material inspection deleted successfully"}
-    except HTTPException:
+        await migration()
+    except Exception:
+        logger.exception("Migration %s failed; releasing its claim so the next startup retries", name)
+        await db.migrations.delete_one({"_id": name})
         raise
-    except Exception as e:
-        logging.error(f"Error deleting material inspection {material_id}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    await db.migrations.update_one({"_id": name}, {"$set": {"completedAt": datetime.utcnow()}})
+    return True
 
-@api_router.post("/material-inspections/bulk-sync")
-async def bulk_sync_material_inspections(sync_data: SyncData):
-    """Bulk sync material inspections from mobile app"""
-    try:
-        operations = []
-        
-        for material in sync_data.materials:
-            # Check if material exists
-            existing = await db.material_inspections.find_one({"id": material.id})
+# Photo storage helpers
+def check_inline_photos(photos):
+    """Reject base64 photo payloads once the deprecated inline path is switched off"""
+    if not ALLOW_INLINE_PHOTOS and photos and any(photo.base64 is not None for photo in photos):
+        raise HTTPException(status_code=422, detail="Inline base64 photos are disabled; upload them as multipart files")
+
+def check_photo_refs(photos):
+    """Reject photos whose gridfs_id is not a GridFS ObjectId
+    
+    Checked on write only, so documents with a bad stored reference still load.
+    """
+    for photo in photos or ():
+        if photo.gridfs_id is not None and not ObjectId.is_valid(photo.gridfs_id):
+            raise HTTPException(status_code=422, detail=f"Photo {photo.id} has an invalid gridfs_id")
+
+async def store_photos(bucket, photos, stored_photos=()):
+    """Upload inline base64 photo data to GridFS, keeping only a reference
+    
+    stored_photos are the photo documents already saved for the inspection. A re-sent
+    photo reuses its stored file only when the content is unchanged (same md5); edited
+    photos get a new file, and the caller deletes the replaced one. Client-sent
+    gridfs_ids are only honoured if the inspection already references that file.
+    """
+    stored_refs = {photo["gridfs_id"] for photo in stored_photos if photo.get("gridfs_id")}
+    stored_by_id = {photo["id"]: photo["gridfs_id"] for photo in stored_photos if photo.get("gridfs_id")}
+    
+    # Checksums of the stored files that re-sent photos might reuse, in one query
+    candidates = [
+        ObjectId(stored_by_id[photo.id]) for photo in photos
+        if photo.base64 is not None and ObjectId.is_valid(stored_by_id.get(photo.id))
+    ]
+    checksums = {}
+    if candidates:
+        async for grid_out in bucket.find({"_id": {"$in": candidates}}):
+            checksums[str(grid_out._id)] = (grid_out.metadata or {}).get("md5")
+    
+    async def store(photo):
+        if photo.base64 is None:
+            if photo.gridfs_id is not None and photo.gridfs_id not in stored_refs:
+                return photo.model_copy(update={"gridfs_id": None})
+            return photo
+        data = b64decode(photo.base64)
+        digest = hashlib.md5(data).hexdigest()
+        gridfs_id = stored_by_id.get(photo.id)
+        if gridfs_id is None or checksums.get(gridfs_id) != digest:
+            gridfs_id = str(await bucket.upload_from_stream(
+                photo.id,
+                data,
+                metadata={"contentType": photo.content_type, "md5": digest}
+            ))
+        return photo.model_copy(update={"gridfs_id": gridfs_id, "base64": None})
+    
+    return list(await asyncio.gather(*(store(photo) for photo in photos)))
+
+async def load_photos(bucket, photos):
+    """Fill in base64 data for photos stored in GridFS
+    
+    A photo whose file is missing (or whose reference is malformed) comes back without data.
+    """
+    async def load(photo):
+        if photo.gridfs_id is None or photo.base64 is not None:
+            return photo
+        try:
+            stream = await bucket.open_download_stream(ObjectId(photo.gridfs_id))
+        except (InvalidId, NoFile):
+            logging.warning("Photo %s references missing GridFS file %s", photo.id, photo.gridfs_id)
+            return photo
+        return photo.model_copy(update={"base64": b64encode(await stream.read()).decode()})
+    
+    return list(await asyncio.gather(*(load(photo) for photo in photos)))
+
+async def delete_photos(bucket, photos):
+    """Remove the GridFS files referenced by stored photo documents, skipping bad references"""
+    async def delete(gridfs_id):
+        try:
+            await bucket.delete(ObjectId(gridfs_id))
+        except (InvalidId, NoFile):
+            pass  # Malformed reference, or the file is already gone
+    
+    await asyncio.gather(*(
+        delete(photo["gridfs_id"]) for photo in photos if photo.get("gridfs_id")
+    ), return_exceptions=True)
+
+async def delete_replaced_photos(bucket, old_photos, new_photos):
+    """Remove the GridFS files of stored photo documents that new_photos no longer reference"""
+    kept = {photo.gridfs_id for photo in new_photos}
+    await delete_photos(bucket, [photo for photo in old_photos if photo.get("gridfs_id") not in kept])
+
+# Inspection routes
+def make_inspection_router(
+    prefix,
+    collection_name,
+    model=MaterialInspection,
+    create_model=MaterialInspectionCreate,
+    update_model=MaterialInspectionUpdate,
+    label="Material inspection"
+):
+    """Build the CRUD, bulk sync, photo upload and dashboard routes for one inspection collection"""
+    router = APIRouter(prefix=f"/{prefix}")
+    cache_key = f"dashboard:{collection_name}"
+    not_found = f"{label} not found"
+    
+    def get_collection(db=Depends(get_db)):
+        return db[collection_name]
+    
+    @router.post("", response_model=model)
+    async def create_inspection(item: create_model, collection=Depends(get_collection), photos=Depends(get_photo_bucket)):
+        """Create a new inspection"""
+        check_inline_photos(item.photos)
+        check_photo_refs(item.photos)
+        try:
+            fields = dict(item)
+            fields["photos"] = await store_photos(photos, item.photos)
+            
+            # The payload was already validated by create_model, so skip re-validation
+            now = datetime.utcnow()
+            inspection = model.model_construct(
+                **fields,
+                id=uuid.uuid4().hex,
+                inspectionDate=now,
+                lastModified=now
+            )
+            
+            result = await collection.insert_one(to_document(inspection))
             
-            if existing:
-                # Update existing
-                operations.append({
-                    "update_one": {
-                        "filter": {"id": material.id},
-                        "update": {"$set": material.dict()},
-                        "upsert": False
-                    }
-                })
+            if result.inserted_id:
+                await invalidate_dashboard_cache(cache_key)
+                return inspection
             else:
-                # Insert new
-                operations.append({
-                    "insert_one": {
-                        "document": material.dict()
-                    }
-                })
-        
-        if operations:
-            # Execute bulk operations
-            for op in operations:
-                if "insert_one" in op:
-                    await db.material_inspections.insert_one(op["insert_one"]["document"])
-                elif "update_one" in op:
-                    await db.material_inspections.update_one(
-                        op["update_one"]["filter"],
-                        op["update_one"]["update"]
-                    )
-        
-        return {
-            "message": f"Successfully synced {len(sync_data.materials)} material inspections",
-            "synced_count": len(sync_data.materials),
-            "sync_timestamp": datetime.utcnow().isoformat()
-        }
-    except Exception as e:
-        logging.error(f"Error in bulk sync: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@api_router.get("/material-inspections/stats/dashboard")
-async def get_dashboard_stats():
-    """Get dashboard statistics"""
-    try:
-        # Total inspections
-        total_count = await db.material_inspections.count_documents({})
-        
-        # Compliant vs Non-compliant
-        compliant_count = await db.material_inspections.count_documents({"nonConforming": False})
-        non_compliant_count = await db.material_inspections.count_documents({"nonConforming": True})
+                raise HTTPException(status_code=500, detail=f"Failed to create {label.lower()}")
+        except Exception as e:
+            logging.error("Error creating %s: %s", label.lower(), e)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.get("", response_model=None)
+    async def get_inspections(skip: int = 0, limit: int = 100, include_photos: bool = False, collection=Depends(get_collection), photos=Depends(get_photo_bucket)):
+        """Get all inspections with pagination
         
-        # Recent inspections (last 7 days)
-        seven_days_ago = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        seven_days_ago = seven_days_ago.replace(day=seven_days_ago.day - 7)
-        recent_count = await db.material_inspections.count_documents({
-            "inspectionDate": {"$gte": seven_days_ago}
-        })
+        Photos are left out unless include_photos is set, in which case each one comes back
+        with its base64 data read from GridFS, as on the detail route.
+        Documents come straight from Mongo, which only stores validated inspections.
+        """
+        try:
+            projection = None if include_photos else {"photos": 0}
+            cursor = collection.find({}, projection=projection).sort("inspectionDate", -1).skip(skip).limit(limit)
+            inspections = await cursor.to_list(length=limit)
+            for inspection in inspections:
+                inspection["id"] = inspection.pop("_id")
+            if include_photos:
+                expanded = await asyncio.gather(*(
+                    load_photos(photos, [PhotoData(**photo) for photo in inspection.get("photos", [])])
+                    for inspection in inspections
+                ))
+                for inspection, inspection_photos in zip(inspections, expanded):
+                    inspection["photos"] = [photo.model_dump() for photo in inspection_photos]
+            return inspections
+        except Exception as e:
+            logging.error("Error getting %ss: %s", label.lower(), e)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.get("/{item_id}", response_model=model)
+    async def get_inspection(item_id: str, expand_photos: bool = True, collection=Depends(get_collection), photos=Depends(get_photo_bucket)):
+        """Get a specific inspection by ID
         
-        # Most common non-conformance types
-        pipeline = [
-            {"$match": {"nonConforming": True, "nonConformanceType": {"$ne": None}}},
-            {"$group": {"_id": "$nonConformanceType", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 5}
-        ]
-        non_conformance_stats = await db.material_inspections.aggregate(pipeline).to_list(5)
+        Photo data is read back from GridFS unless expand_photos is false. Documents that
+        still embed base64 photos are migrated to GridFS on first read.
+        """
+        try:
+            inspection = await collection.find_one({"_id": item_id})
+            if not inspection:
+                raise HTTPException(status_code=404, detail=not_found)
+            
+            inspection_photos = [PhotoData(**photo) for photo in inspection.get("photos", [])]
+            if any(photo.base64 is not None for photo in inspection_photos):
+                migrated = await store_photos(photos, inspection_photos, inspection["photos"])
+                # Only write if nobody changed the photos meanwhile, e.g. a concurrent GET migrating them
+                result = await collection.update_one(
+                    {"_id": item_id, "photos": inspection["photos"]},
+                    {"$set": {"photos": [photo.model_dump() for photo in migrated]}}
+                )
+                if result.modified_count:
+                    inspection_photos = migrated
+                else:
+                    # Lost the race: drop the files uploaded here and use the stored photos instead
+                    uploaded = [
+                        photo.model_dump() for photo, original in zip(migrated, inspection_photos)
+                        if photo.gridfs_id != original.gridfs_id
+                    ]
+                    await delete_photos(photos, uploaded)
+                    current = await collection.find_one({"_id": item_id}, projection={"photos": 1})
+                    if not current:
+                        raise HTTPException(status_code=404, detail=not_found)
+                    inspection_photos = [PhotoData(**photo) for photo in current.get("photos", [])]
+            if expand_photos:
+                inspection_photos = await load_photos(photos, inspection_photos)
+            
+            inspection["photos"] = inspection_photos
+            return model(**inspection)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error("Error getting %s %s: %s", label.lower(), item_id, e)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    async def replace_photos(collection, bucket, item_id, new_photos, update_data):
+        """Apply update_data with a new photo list, then delete the files it replaced
         
-        return {
-            "totalInspections": total_count,
-            "compliantCount": compliant_count,
-            "nonCompliantCount": non_compliant_count,
-            "recentCount": recent_count,
-            "complianceRate": (compliant_count / total_count * 100) if total_count > 0 else 0,
-            "nonConformanceTypes": non_conformance_stats
-        }
-    except Exception as e:
-        logging.error(f"Error getting dashboard stats: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-# Backward compatibility - redirect cargo endpoints to material endpoints
-@api_router.post("/cargo-inspections", response_model=MaterialInspection)
-async def create_cargo_inspection_compat(material: MaterialInspectionCreate):
-    return await create_material_inspection(material)
-
-@api_router.get("/cargo-inspections", response_model=List[MaterialInspection])
-async def get_cargo_inspections_compat(skip: int = 0, limit: int = 100):
-    return await get_material_inspections(skip, limit)
-
-@api_router.get("/cargo-inspections/{material_id}", response_model=MaterialInspection)
-async def get_cargo_inspection_compat(material_id: str):
-    return await get_material_inspection(material_id)
+        The write only lands if the stored photos are still the ones the new list was built
+        against; a concurrent PUT or photo upload makes it re-read and rebuild.
+        """
+        for _ in range(PHOTO_UPDATE_ATTEMPTS):
+            existing = await collection.find_one({"_id": item_id}, projection={"photos": 1})
+            if existing is None:
+                raise HTTPException(status_code=404, detail=not_found)
+            previous_photos = existing.get("photos")
+            stored_photos = await store_photos(bucket, new_photos, previous_photos or ())
+            
+            photo_data = {"photos": [photo.model_dump() for photo in stored_photos]}
+            before = await collection.find_one_and_update(
+                {"_id": item_id, "photos": previous_photos if previous_photos is not None else {"$exists": False}},
+                {"$set": {**update_data, **photo_data}},
+                return_document=ReturnDocument.BEFORE
+            )
+            if before is not None:
+                # Delete against the document that was actually replaced
+                await delete_replaced_photos(bucket, before.get("photos", []), stored_photos)
+                return {**before, **update_data, **photo_data}
+            
+            # Lost the race: drop only the files uploaded for this attempt, then retry
+            previous_refs = {photo.get("gridfs_id") for photo in previous_photos or ()}
+            await delete_photos(bucket, [
+                photo.model_dump() for photo in stored_photos
+                if photo.gridfs_id and photo.gridfs_id not in previous_refs
+            ])
+        raise HTTPException(status_code=409, detail=f"{label} photos changed concurrently; retry the update")
+    
+    @router.put("/{item_id}", response_model=model)
+    async def update_inspection(item_id: str, item_update: update_model, collection=Depends(get_collection), photos=Depends(get_photo_bucket)):
+        """Update an inspection"""
+        check_inline_photos(item_update.photos)
+        check_photo_refs(item_update.photos)
+        try:
+            # Update only the fields the client sent; an explicit null clears optional fields
+            update_data = {
+                k: v for k, v in item_update.model_dump(exclude_unset=True).items()
+                if v is not None or model.model_fields[k].default is None
+            }
+            update_data["lastModified"] = datetime.utcnow()
+            
+            if item_update.photos is None:
+                # Update and read back the new document atomically in one round-trip
+                updated = await collection.find_one_and_update(
+                    {"_id": item_id},
+                    {"$set": update_data},
+                    return_document=ReturnDocument.AFTER
+                )
+                if updated is None:
+                    raise HTTPException(status_code=404, detail=not_found)
+            else:
+                updated = await replace_photos(collection, photos, item_id, item_update.photos, update_data)
+            await invalidate_dashboard_cache(cache_key)
+            
+            return model(**updated)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error("Error updating %s %s: %s", label.lower(), item_id, e)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.delete("/{item_id}")
+    async def delete_inspection(item_id: str, collection=Depends(get_collection), photos=Depends(get_photo_bucket)):
+        """Delete an inspection"""
+        try:
+            deleted = await collection.find_one_and_delete(
+                {"_id": item_id},
+                projection={"photos": 1}
+            )
+            if deleted is None:
+                raise HTTPException(status_code=404, detail=not_found)
+            await delete_photos(photos, deleted.get("photos", []))
+            await invalidate_dashboard_cache(cache_key)
+            return {"message": f"{label} deleted successfully"}
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error("Error deleting %s %s: %s", label.lower(), item_id, e)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.post("/bulk-sync")
+    async def bulk_sync_inspections(sync_data: SyncData, collection=Depends(get_collection), photos=Depends(get_photo_bucket)):
+        """Bulk sync inspections from mobile app"""
+        for item in sync_data.materials:
+            check_inline_photos(item.photos)
+            check_photo_refs(item.photos)
+        try:
+            synced_count = 0
+            if sync_data.materials:
+                # Re-sent records keep their existing GridFS files rather than uploading copies
+                previous_photos = {
+                    document["_id"]: document.get("photos", [])
+                    async for document in collection.find(
+                        {"_id": {"$in": [item.id for item in sync_data.materials]}},
+                        projection={"photos": 1}
+                    )
+                }
+                stored_photos = await asyncio.gather(*(
+                    store_photos(photos, item.photos, previous_photos.get(item.id, ()))
+                    for item in sync_data.materials
+                ))
+                for item, item_photos in zip(sync_data.materials, stored_photos):
+                    item.photos = item_photos
+                
+                operations = [
+                    UpdateOne({"_id": item.id}, {"$set": item.model_dump(exclude={"id"})}, upsert=True)
+                    for item in sync_data.materials
+                ]
+                result = await collection.bulk_write(operations, ordered=False)
+                synced_count = result.upserted_count + result.modified_count
+                await asyncio.gather(*(
+                    delete_replaced_photos(photos, previous_photos[item.id], item.photos)
+                    for item in sync_data.materials
+                    if item.id in previous_photos
+                ))
+                await invalidate_dashboard_cache(cache_key)
+            
+            return {
+                "message": f"Successfully synced {synced_count} {label.lower()}s",
+                "synced_count": synced_count,
+                "sync_timestamp": datetime.utcnow().isoformat()
+            }
+        except Exception as e:
+            logging.error("Error in bulk sync: %s", e)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.post("/bulk-delete")
+    async def bulk_delete_inspections(delete_data: BulkDeleteRequest, collection=Depends(get_collection), photos=Depends(get_photo_bucket)):
+        """Delete several inspections in one round-trip"""
+        try:
+            deleted_count = 0
+            if delete_data.ids:
+                query = {"_id": {"$in": delete_data.ids}}
+                deleted = await collection.find(query, projection={"photos": 1}).to_list(length=None)
+                result = await collection.delete_many(query)
+                deleted_count = result.deleted_count
+                await delete_photos(photos, [photo for item in deleted for photo in item.get("photos", [])])
+                await invalidate_dashboard_cache(cache_key)
+            
+            return {
+                "message": f"Successfully deleted {deleted_count} {label.lower()}s",
+                "deleted_count": deleted_count
+            }
+        except Exception as e:
+            logging.error("Error in bulk delete: %s", e)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.post("/{item_id}/photos", response_model=PhotoData)
+    async def upload_photo(
+        item_id: str,
+        file: UploadFile = File(...),
+        photo_id: Optional[str] = Form(None),
+        timestamp: Optional[str] = Form(None),
+        width: Optional[int] = Form(None),
+        height: Optional[int] = Form(None),
+        collection=Depends(get_collection),
+        photos=Depends(get_photo_bucket)
+    ):
+        """Attach a photo uploaded as multipart/form-data, streaming it straight into GridFS"""
+        try:
+            photo = PhotoData(
+                id=photo_id or uuid.uuid4().hex,
+                timestamp=timestamp or datetime.utcnow().isoformat(),
+                width=width,
+                height=height,
+                content_type=file.content_type or "image/jpeg"
+            )
+            
+            # Don't stream megabytes into GridFS for an inspection that doesn't exist
+            if await collection.find_one({"_id": item_id}, projection={"_id": 1}) is None:
+                raise HTTPException(status_code=404, detail=not_found)
+            
+            upload = photos.open_upload_stream(photo.id, metadata={"contentType": photo.content_type})
+            try:
+                size = 0
+                while chunk := await file.read(PHOTO_UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > MAX_PHOTO_UPLOAD_BYTES:
+                        raise HTTPException(status_code=413, detail=f"Photo exceeds {MAX_PHOTO_UPLOAD_BYTES} bytes")
+                    await upload.write(chunk)
+            except BaseException:
+                # Over the limit, client disconnect or Mongo error: drop the chunks already written
+                await upload.abort()
+                raise
+            await upload.close()
+            photo.gridfs_id = str(upload._id)
+            
+            result = await collection.update_one(
+                {"_id": item_id},
+                {"$push": {"photos": photo.model_dump()}, "$set": {"lastModified": datetime.utcnow()}}
+            )
+            if result.matched_count == 0:
+                # Deleted while the upload was streaming
+                await photos.delete(upload._id)
+                raise HTTPException(status_code=404, detail=not_found)
+            return photo
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error("Error uploading photo for %s %s: %s", label.lower(), item_id, e)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.get("/stats/dashboard")
+    async def get_dashboard_stats(collection=Depends(get_collection)):
+        """Get dashboard statistics"""
+        try:
+            cached_stats = await get_cached_dashboard_stats(cache_key)
+            if cached_stats is not None:
+                return cached_stats
+            
+            # Recent inspections (last 7 days)
+            seven_days_ago = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=7)
+            
+            # Counts and most common non-conformance types in a single pass
+            pipeline = [
+                {"$facet": {
+                    "total": [{"$count": "n"}],
+                    "compliant": [{"$match": {"nonConforming": False}}, {"$count": "n"}],
+                    "nonCompliant": [{"$match": {"nonConforming": True}}, {"$count": "n"}],
+                    "recent": [{"$match": {"inspectionDate": {"$gte": seven_days_ago}}}, {"$count": "n"}],
+                    "types": [
+                        {"$match": {"nonConforming": True, "nonConformanceType": {"$ne": None}}},
+                        {"$group": {"_id": "$nonConformanceType", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1}},
+                        {"$limit": 5}
+                    ]
+                }}
+            ]
+            stats = (await (await collection.aggregate(pipeline)).to_list(1))[0]
+            
+            def facet_count(name):
+                # $count emits no document at all when nothing matched
+                return stats[name][0].get("n", 0) if stats[name] else 0
+            
+            total_count = facet_count("total")
+            compliant_count = facet_count("compliant")
+            non_compliant_count = facet_count("nonCompliant")
+            recent_count = facet_count("recent")
+            non_conformance_stats = stats["types"]
+            
+            dashboard_stats = {
+                "totalInspections": total_count,
+                "compliantCount": compliant_count,
+                "nonCompliantCount": non_compliant_count,
+                "recentCount": recent_count,
+                "complianceRate": (compliant_count / total_count * 100) if total_count > 0 else 0,
+                "nonConformanceTypes": non_conformance_stats
+            }
+            await set_cached_dashboard_stats(cache_key, dashboard_stats)
+            return dashboard_stats
+        except Exception as e:
+            logging.error("Error getting dashboard stats: %s", e)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    return router
 
-@api_router.put("/cargo-inspections/{material_id}", response_model=MaterialInspection)
-async def update_cargo_inspection_compat(material_id: str, material_update: MaterialInspectionUpdate):
-    return await update_material_inspection(material_id, material_update)
+api_router.include_router(make_inspection_router("material-inspections", "material_inspections"))
 
-@api_router.delete("/cargo-inspections/{material_id}")
-async def delete_cargo_inspection_compat(material_id: str):
-    return await delete_material_inspection(material_id)
+# Backward compatibility - cargo endpoints serve the same material collection
+api_router.include_router(make_inspection_router("cargo-inspections", "material_inspections"))
 
-@api_router.get("/cargo-inspections/stats/dashboard")
-async def get_cargo_dashboard_stats_compat():
-    return await get_dashboard_stats()
+# Photo binaries
+@api_router.get("/photos/{gridfs_id}")
+async def get_photo(gridfs_id: str, photos=Depends(get_photo_bucket)):
+    """Stream a stored photo's raw bytes"""
+    try:
+        stream = await photos.open_download_stream(ObjectId(gridfs_id))
+    except (InvalidId, NoFile):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    content_type = (stream.metadata or {}).get("contentType", "image/jpeg")
+    return Response(content=await stream.read(), media_type=content_type)
 
 # Health check
 @api_router.get("/health")
 async def health_check():
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.utcnow(),
         "service": "material-receiving-control-api"
     }
 
@@ -296,21 +720,77 @@ async def root():
 # Include the router in the main app
 app.include_router(api_router)
 
+# Comma-separated list of allowed origins; credentials are only allowed with an explicit list
+cors_origins = [origin.strip() for origin in os.environ.get('FRONTEND_ORIGINS', '*').split(',') if origin.strip()]
 app.add_middleware(
     CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_credentials="*" not in cors_origins,
+    allow_origins=cors_origins,
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+# Base64-heavy JSON compresses several times over; skip tiny responses
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+@app.on_event("startup")
+async def startup_db_client():
+    """Create the shared Mongo client and the indexes used by dashboard filters
+    
+    Point lookups use the implicit _id index.
+    """
+    app.state.client = AsyncMongoClient(
+        mongo_url,
+        maxPoolSize=50,
+        minPoolSize=10,
+        maxIdleTimeMS=30000,
+        serverSelectionTimeoutMS=2000
+    )
+    app.state.db = db = app.state.client[os.environ['DB_NAME']]
+    app.state.photos = AsyncGridFSBucket(db, bucket_name="photos")
+    
+    await run_migration_once(db, LEGACY_IDS_MIGRATION, lambda: migrate_legacy_ids(db.material_inspections))
+    await db.material_inspections.create_index([("inspectionDate", -1)])
+    await db.material_inspections.create_index([("nonConforming", 1), ("inspectionDate", -1)])
+    await db.material_inspections.create_index([("nonConforming", 1), ("nonConformanceType", 1)])
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await app.state.client.close()
+    log_listener.stop()
+
+async def run_migrations():
+    """One-off command: (re-)run the data migrations and record them as completed"""
+    client = AsyncMongoClient(mongo_url, serverSelectionTimeoutMS=2000)
+    try:
+        db = client[os.environ['DB_NAME']]
+        await migrate_legacy_ids(db.material_inspections)
+        await db.migrations.update_one(
+            {"_id": LEGACY_IDS_MIGRATION},
+            {"$set": {"completedAt": datetime.utcnow()}, "$setOnInsert": {"startedAt": datetime.utcnow()}},
+            upsert=True
+        )
+    finally:
+        await client.close()
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["migrate"]:
+        asyncio.run(run_migrations())
+        log_listener.stop()
+        sys.exit()
+    
+    # Development entry point; production runs the same settings via
+    # `uvicorn server:app --loop uvloop --http httptools --workers N --no-access-log`.
+    # Every worker opens its own Mongo pool (maxPoolSize above), so size N accordingly.
+    import uvicorn
+    
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8001)),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        access_log=False
+    )
@@ -4,95 +4,468 @@ Comprehensive Backend API Testing for Material Receiving Control App
 Tests all CRUD operations, validation, new field structure, and backward compatibility
 """
 
-import requests
+import argparse
+import asyncio
+import sys
+import httpx
+import orjson
+import ijson
+import fastjsonschema
 import json
 import base64
 from datetime import datetime
 import uuid
+import secrets
 import time
+import threading
+import re
+import statistics
+from collections import Counter, deque
+from email.parser import BytesParser
+from email.policy import HTTP
+from dataclasses import dataclass, field
 
 # Backend URL from environment
 BACKEND_URL = "https://receipt-monitor.preview.emergentagent.com/api"
 
+# API paths, relative to the client's base_url
+HEALTH_PATH = "/health"
+ROOT_PATH = "/"
+MATERIALS_PATH = "/material-inspections"
+MATERIALS_BULK_SYNC_PATH = MATERIALS_PATH + "/bulk-sync"
+MATERIALS_BULK_DELETE_PATH = MATERIALS_PATH + "/bulk-delete"
+MATERIALS_STATS_PATH = MATERIALS_PATH + "/stats/dashboard"
+CARGO_PATH = "/cargo-inspections"
+CARGO_STATS_PATH = CARGO_PATH + "/stats/dashboard"
+PHOTOS_PATH = "/photos"
+
+# Set per JSON request rather than on the client, so multipart uploads get their own boundary header
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Mirrors the server's MAX_PHOTO_UPLOAD_BYTES default; larger multipart uploads get a 413
+MAX_PHOTO_UPLOAD_BYTES = 10 << 20
+
+# Every request fails fast on a stalled backend: 3s to connect, 10s per read/write/pool wait
+TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+
+# Transient gateway errors on idempotent requests are retried with exponential backoff
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.1
+RETRY_STATUSES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+
+# Upper bound on fallback per-ID DELETEs in flight during cleanup
+CLEANUP_CONCURRENCY = 16
+
+# Requests in flight at once during the optional --load stage
+LOAD_CONCURRENCY = 16
+
+# Read-only GET responses shared by every tester in the process (e.g. the pytest session
+# and a direct run): (base URL, mock flag, path) -> (monotonic fetch time, response)
+_GET_CACHE = {}
+_GET_CACHE_LOCK = threading.Lock()
+
+# Latencies are grouped per endpoint, so collapse inspection/photo IDs in paths
+_ID_SEGMENT = re.compile(r"/(?:[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}|[0-9a-f]{24})(?=/|$)")
+
+# Simple 1x1 pixel PNG in base64, and the photo fields every sample shares
+_SAMPLE_PNG_B64: bytes = b"iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+PHOTO_TEMPLATE = {"base64": _SAMPLE_PNG_B64.decode(), "width": 1920, "height": 1080}
+
+# Placeholder serialised in a photo's slot and swapped for its pre-encoded JSON afterwards
+PHOTO_SENTINEL = "__photo__"
+_PHOTO_SENTINEL_JSON = orjson.dumps(PHOTO_SENTINEL)
+
+# Fields shared by every sample material, and the per-case overrides layered on top
+MATERIAL_TEMPLATE = {
+    "invoiceNumber": "MAT-2025-001",
+    "materialType": "Steel Beams",
+    "receiveDate": "18/01/2025",
+    "qualityInspector": "John Smith",
+    "nonConforming": True,
+    "nonConformanceType": "Physical Damage",
+    "nonConformingQuantity": "5",
+    "notes": "Minor scratches on 5 beams"
+}
+MATERIAL_CASES = {
+    # quantityReceived as null/empty (should work)
+    "optional_quantity": {"quantityReceived": None},
+    "with_all_inspectors": {"quantityReceived": "100", "safetyInspector": "Jane Doe", "logisticsInspector": "Bob Wilson"},
+    "empty_optional_inspector": {"quantityReceived": "50", "safetyInspector": "Jane Doe", "logisticsInspector": ""},
+    # Only the mandatory qualityInspector
+    "only_quality_inspector": {"quantityReceived": "75"}
+}
+
+# Valid create cases sent together through bulk-sync: (result label, check on the stored record, failure message)
+POSITIVE_CREATE_CASES = {
+    "optional_quantity": (
+        "Create Material (Optional Quantity)",
+        lambda data: "id" in data and "qualityInspector" in data,
+        "Missing required fields"
+    ),
+    "with_all_inspectors": (
+        "Create Material (All Inspectors)",
+        lambda data: "qualityInspector" in data and "safetyInspector" in data and "logisticsInspector" in data,
+        "Inspector fields missing"
+    ),
+    "only_quality_inspector": (
+        "Create Material (Quality Inspector Only)",
+        lambda data: data.get("qualityInspector") == "John Smith",
+        "Quality inspector not set"
+    ),
+    "empty_optional_inspector": (
+        "Create Material (Empty Optional Inspector)",
+        lambda data: "qualityInspector" in data and "safetyInspector" in data,
+        "Inspector fields issue"
+    )
+}
+
+# Local mirror of the server's MaterialInspectionCreate model. Positive-path payloads are
+# checked against it before sending, so a broken test payload fails without a round-trip.
+_NULLABLE_STRING = {"type": ["string", "null"]}
+_NULLABLE_INT = {"type": ["integer", "null"]}
+MATERIAL_SCHEMA = {
+    "type": "object",
+    "required": ["invoiceNumber", "materialType", "receiveDate", "qualityInspector"],
+    "properties": {
+        "invoiceNumber": {"type": "string"},
+        "materialType": {"type": "string"},
+        "quantityReceived": _NULLABLE_STRING,
+        "receiveDate": {"type": "string"},
+        "qualityInspector": {"type": "string"},
+        "safetyInspector": _NULLABLE_STRING,
+        "logisticsInspector": _NULLABLE_STRING,
+        "nonConforming": {"type": "boolean"},
+        "nonConformanceType": _NULLABLE_STRING,
+        "nonConformingQuantity": _NULLABLE_STRING,
+        "notes": _NULLABLE_STRING,
+        "photos": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["id", "timestamp"],
+                "properties": {
+                    "id": {"type": "string"},
+                    "gridfs_id": _NULLABLE_STRING,
+                    "base64": _NULLABLE_STRING,
+                    "timestamp": {"type": "string"},
+                    "width": _NULLABLE_INT,
+                    "height": _NULLABLE_INT,
+                    "content_type": {"type": "string"}
+                }
+            }
+        }
+    }
+}
+_VALIDATE_MATERIAL = fastjsonschema.compile(MATERIAL_SCHEMA)
+
+# Create bodies for the --load stage, encoded once at import and recycled round-robin.
+# The server assigns each create a fresh ID, so identical bodies still make distinct records.
+_PRECANNED_PHOTO = {**PHOTO_TEMPLATE, "id": "load-photo", "timestamp": "2025-01-18T00:00:00"}
+PRECANNED_POSTS = [
+    orjson.dumps({**MATERIAL_TEMPLATE, **MATERIAL_CASES[case], "photos": [_PRECANNED_PHOTO]})
+    for case in POSITIVE_CREATE_CASES
+]
+
+@dataclass(slots=True)
+class Results:
+    """Pass/fail tally for a test run"""
+    counts: Counter = field(default_factory=Counter)  # "passed"/"failed" -> checks; sums across runs with +
+    errors: deque = field(default_factory=deque)
+    durations: dict = field(default_factory=dict)  # "METHOD /path" -> [nanoseconds, ...]
+    
+    @property
+    def passed(self):
+        return self.counts["passed"]
+    
+    @property
+    def failed(self):
+        return self.counts["failed"]
+
+class MockBackend:
+    """In-memory stand-in for the API, served through httpx.MockTransport for --mock runs"""
+    
+    COLLECTIONS = ("material-inspections", "cargo-inspections")  # both views share one store
+    
+    def __init__(self, base_url=BACKEND_URL):
+        self.prefix = httpx.URL(base_url).path.rstrip("/")
+        self.inspections = {}
+        self.files = {}  # gridfs_id -> (bytes, content type), standing in for the GridFS bucket
+    
+    def __call__(self, request):
+        path = request.url.path[len(self.prefix):].strip("/")
+        parts = path.split("/") if path else []
+        method = request.method
+        
+        if not parts:
+            return self._json({"message": "Material Receiving Control API", "version": "1.0.0"})
+        if parts == ["health"]:
+            return self._json({"status": "healthy", "timestamp": datetime.utcnow().isoformat()})
+        if parts[0] == "photos" and len(parts) == 2 and method == "GET":
+            if parts[1] not in self.files:
+                return self._json({"detail": "Photo not found"}, 404)
+            data, content_type = self.files[parts[1]]
+            return httpx.Response(200, content=data, headers={"Content-Type": content_type})
+        if parts[0] not in self.COLLECTIONS:
+            return self._json({"detail": "Not Found"}, 404)
+        
+        tail = parts[1:]
+        if not tail and method == "GET":
+            skip = int(request.url.params.get("skip", 0))
+            limit = int(request.url.params.get("limit", 100))
+            return self._json(list(self.inspections.values())[skip:skip + limit])
+        if not tail and method == "POST":
+            payload = orjson.loads(request.content)
+            try:
+                _VALIDATE_MATERIAL(payload)
+            except fastjsonschema.JsonSchemaException as e:
+                return self._json({"detail": [{"msg": e.message}]}, 422)
+            return self._json(self._store({**payload, "id": uuid.uuid4().hex}))
+        if tail == ["bulk-sync"] and method == "POST":
+            materials = orjson.loads(request.content)["materials"]
+            for material in materials:
+                self._store(material)
+            return self._json({
+                "message": f"Successfully synced {len(materials)} inspections",
+                "synced_count": len(materials),
+                "sync_timestamp": datetime.utcnow().isoformat()
+            })
+        if tail == ["bulk-delete"] and method == "POST":
+            ids = orjson.loads(request.content)["ids"]
+            deleted_count = sum(self.inspections.pop(item_id, None) is not None for item_id in ids)
+            return self._json({"message": f"Successfully deleted {deleted_count} inspections", "deleted_count": deleted_count})
+        if tail == ["stats", "dashboard"] and method == "GET":
+            total_count = len(self.inspections)
+            non_compliant_count = sum(bool(item.get("nonConforming")) for item in self.inspections.values())
+            compliant_count = total_count - non_compliant_count
+            return self._json({
+                "totalInspections": total_count,
+                "compliantCount": compliant_count,
+                "nonCompliantCount": non_compliant_count,
+                "recentCount": total_count,
+                "complianceRate": (compliant_count / total_count * 100) if total_count > 0 else 0
+            })
+        if len(tail) == 2 and tail[1] == "photos" and method == "POST":
+            return self._upload_photo(tail[0], request)
+        if len(tail) == 1:
+            item = self.inspections.get(tail[0])
+            if item is None:
+                return self._json({"detail": "Inspection not found"}, 404)
+            if method == "GET":
+                return self._json(item)
+            if method == "PUT":
+                item.update(orjson.loads(request.content), lastModified=datetime.utcnow().isoformat())
+                return self._json(item)
+            if method == "DELETE":
+                del self.inspections[tail[0]]
+                return self._json({"message": "Inspection deleted successfully"})
+        return self._json({"detail": "Method Not Allowed"}, 405)
+    
+    def _upload_photo(self, item_id, request):
+        fields = {}
+        message = BytesParser(policy=HTTP).parsebytes(
+            b"Content-Type: " + request.headers["Content-Type"].encode() + b"\r\n\r\n" + request.content
+        )
+        for part in message.iter_parts():
+            fields[part.get_param("name", header="content-disposition")] = part
+        item = self.inspections.get(item_id)
+        if item is None:
+            return self._json({"detail": "Inspection not found"}, 404)
+        upload = fields["file"]
+        data = upload.get_payload(decode=True)
+        if len(data) > MAX_PHOTO_UPLOAD_BYTES:
+            return self._json({"detail": f"Photo exceeds {MAX_PHOTO_UPLOAD_BYTES} bytes"}, 413)
+        
+        def form_value(name):
+            return fields[name].get_content().strip() if name in fields else None
+        
+        gridfs_id = secrets.token_hex(12)  # same shape as a GridFS ObjectId
+        self.files[gridfs_id] = (data, upload.get_content_type())
+        photo = {
+            "id": form_value("photo_id") or uuid.uuid4().hex,
+            "gridfs_id": gridfs_id,
+            "base64": None,
+            "timestamp": form_value("timestamp") or datetime.utcnow().isoformat(),
+            "width": int(form_value("width")) if form_value("width") else None,
+            "height": int(form_value("height")) if form_value("height") else None,
+            "content_type": upload.get_content_type()
+        }
+        item.setdefault("photos", []).append(photo)
+        item["lastModified"] = datetime.utcnow().isoformat()
+        return self._json(photo)
+    
+    def _store(self, material):
+        now = datetime.utcnow().isoformat()
+        record = {"inspectionDate": now, "lastModified": now, **material}
+        self.inspections[record["id"]] = record
+        return record
+    
+    @staticmethod
+    def _json(payload, status_code=200):
+        return httpx.Response(status_code, content=orjson.dumps(payload), headers={"Content-Type": "application/json"})
+
 class MaterialReceivingAPITester:
-    def __init__(self):
+    def __init__(self, mock=False, load_requests=0):
         self.base_url = BACKEND_URL
-        self.session = requests.Session()
+        self.mock = mock  # serve requests from an in-memory MockBackend instead of the network
+        self.load_requests = load_requests  # creates sent by the --load stage; 0 skips it
+        self.client = None  # httpx.AsyncClient, opened by run_all_tests
         self.test_material_ids = []
-        self.test_results = {
-            "passed": 0,
-            "failed": 0,
-            "errors": []
-        }
+        self._batch_ts = datetime.utcnow().isoformat()  # shared photo timestamp, reset per run
+        self.results = Results()
+        self._log_buf = []  # (success, test name, message) awaiting flush_log
     
     def log_result(self, test_name, success, message=""):
         """Log test results"""
-        if success:
-            self.test_results["passed"] += 1
-            print(f"✅ {test_name}: PASSED {message}")
+        self.results.counts["passed" if success else "failed"] += 1
+        if not success:
+            self.results.errors.append(f"{test_name}: {message}")
+        self._log_buf.append((success, test_name, message))  # formatted only when flushed
+    
+    def _trunc_body(self, response, n=256):
+        """First n bytes of a response body for failure messages, without decoding the rest"""
+        return response.content[:n].decode("utf-8", "replace")
+    
+    def flush_log(self):
+        """Write buffered result lines in one go"""
+        if self._log_buf:
+            sys.stdout.write("".join(
+                f"✅ {name}: PASSED {message}\n" if success else f"❌ {name}: FAILED - {message}\n"
+                for success, name, message in self._log_buf
+            ))
+            sys.stdout.flush()
+            self._log_buf.clear()
+    
+    def open_client(self):
+        """Build the shared AsyncClient; callers own closing it"""
+        if self.mock:
+            transport = httpx.MockTransport(MockBackend(self.base_url))
         else:
-            self.test_results["failed"] += 1
-            self.test_results["errors"].append(f"{test_name}: {message}")
-            print(f"❌ {test_name}: FAILED - {message}")
+            # HTTP/2 multiplexes the concurrent tests over one TLS connection to the backend.
+            # Connection failures are retried by the transport; gateway statuses are retried in request()
+            transport = httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=MAX_RETRIES,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=75)
+            )
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            transport=transport,
+            headers={"Connection": "keep-alive"},
+            timeout=TIMEOUT
+        )
+    
+    async def request(self, method, path, **kwargs):
+        """Send a request relative to the API base URL, retrying idempotent ones on transient gateway errors"""
+        if method != "GET":
+            with _GET_CACHE_LOCK:
+                _GET_CACHE.clear()  # Any write may change what the cached reads return
+        started = time.perf_counter_ns()
+        # A POST that timed out at the gateway may still have committed, so only replay idempotent methods
+        retries = MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+        for attempt in range(retries + 1):
+            response = await self.client.request(method, path, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                break
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+        self._record_duration(method, path, started)
+        return response
+    
+    def _record_duration(self, method, path, started):
+        endpoint = f"{method} {_ID_SEGMENT.sub('/{id}', path.split('?', 1)[0])}"
+        self.results.durations.setdefault(endpoint, []).append(time.perf_counter_ns() - started)
+    
+    async def count_list_items(self, path):
+        """Stream a list endpoint and count its top-level items without building them.
+        
+        Returns (response, count); count is None when the body is not a JSON array.
+        """
+        started = time.perf_counter_ns()
+        count, is_array = 0, None
+        # Same gateway-error retries as request(); a retried stream is simply reopened
+        for attempt in range(MAX_RETRIES + 1):
+            async with self.client.stream("GET", path) as response:
+                if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    if response.status_code == 200:
+                        events = ijson.sendable_list()
+                        parser = ijson.parse_coro(events)
+                        async for chunk in response.aiter_bytes():
+                            parser.send(chunk)
+                            for prefix, event, _ in events:
+                                if is_array is None:
+                                    is_array = event == "start_array"
+                                elif prefix == "item" and event in ("start_map", "start_array", "string", "number", "boolean", "null"):
+                                    count += 1
+                            del events[:]
+                        parser.close()
+                    else:
+                        await response.aread()  # keep the body around for failure messages
+                    break
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+        self._record_duration("GET", path, started)
+        return response, count if is_array else None
+    
+    def _encode(self, payload):
+        """Serialise a request body once; pre-encoded bytes pass through untouched"""
+        return payload if isinstance(payload, bytes) else orjson.dumps(payload)
+    
+    async def post_json(self, path, payload):
+        """POST a JSON body; retries in request() resend the same encoded bytes"""
+        return await self.request("POST", path, content=self._encode(payload), headers=JSON_HEADERS)
+    
+    async def put_json(self, path, payload):
+        """PUT a JSON body; retries in request() resend the same encoded bytes"""
+        return await self.request("PUT", path, content=self._encode(payload), headers=JSON_HEADERS)
+    
+    async def cached_get(self, path, ttl=5.0):
+        """GET a read-only endpoint, reusing a response fetched less than ttl seconds ago"""
+        key = (self.base_url, self.mock, path)
+        with _GET_CACHE_LOCK:
+            cached = _GET_CACHE.get(key)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        response = await self.request("GET", path)
+        if response.status_code == 200:
+            with _GET_CACHE_LOCK:
+                _GET_CACHE[key] = (time.monotonic(), response)
+        return response
+    
+    def created_id(self, index):
+        """ID of the index-th record this run created, or None if fewer were created"""
+        return self.test_material_ids[index] if index < len(self.test_material_ids) else None
+    
+    def _gen_ids(self, n):
+        """n random uuid4 hex IDs drawn from a single entropy read"""
+        buf = secrets.token_bytes(16 * n)
+        return [uuid.UUID(bytes=buf[i * 16:(i + 1) * 16], version=4).hex for i in range(n)]
     
     def create_sample_photo_data(self):
         """Create sample base64 photo data"""
-        # Simple 1x1 pixel PNG in base64
-        sample_base64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
-        return {
-            "id": str(uuid.uuid4()),
-            "base64": sample_base64,
-            "timestamp": datetime.utcnow().isoformat(),
-            "width": 1920,
-            "height": 1080
-        }
+        return {**PHOTO_TEMPLATE, "id": uuid.uuid4().hex, "timestamp": self._batch_ts}
     
     def create_test_material_data(self, test_case="standard"):
         """Create test material inspection data based on test case"""
-        base_data = {
-            "invoiceNumber": "MAT-2025-001",
-            "materialType": "Steel Beams",
-            "receiveDate": "18/01/2025",
-            "qualityInspector": "John Smith",
-            "nonConforming": True,
-            "nonConformanceType": "Physical Damage",
-            "nonConformingQuantity": "5",
-            "notes": "Minor scratches on 5 beams",
-            "photos": [self.create_sample_photo_data()]
-        }
+        base_data = {**MATERIAL_TEMPLATE, **MATERIAL_CASES.get(test_case, {}), "photos": [self.create_sample_photo_data()]}
         
-        if test_case == "optional_quantity":
-            # Test with quantityReceived as null/empty (should work)
-            base_data["quantityReceived"] = None
-        elif test_case == "with_all_inspectors":
-            # Test with all inspector fields
-            base_data.update({
-                "quantityReceived": "100",
-                "safetyInspector": "Jane Doe",
-                "logisticsInspector": "Bob Wilson"
-            })
-        elif test_case == "empty_optional_inspector":
-            # Test with empty optional inspector
-            base_data.update({
-                "quantityReceived": "50",
-                "safetyInspector": "Jane Doe",
-                "logisticsInspector": ""
-            })
-        elif test_case == "only_quality_inspector":
-            # Test with only mandatory qualityInspector
-            base_data["quantityReceived"] = "75"
-        elif test_case == "missing_quality_inspector":
+        if test_case == "missing_quality_inspector":
             # Test validation - should fail without qualityInspector
             del base_data["qualityInspector"]
+            return base_data
         
+        _VALIDATE_MATERIAL(base_data)  # raises JsonSchemaException for a malformed positive payload
         return base_data
     
-    def test_health_check(self):
+    def build_material_json(self, material_data, photos_json):
+        """Serialise a material with an already-encoded photo spliced in as its photos array"""
+        envelope = orjson.dumps({**material_data, "photos": [PHOTO_SENTINEL]})
+        return envelope.replace(_PHOTO_SENTINEL_JSON, photos_json, 1)
+    
+    async def test_health_check(self):
         """Test health check endpoint"""
         try:
-            response = self.session.get(f"{self.base_url}/health")
+            response = await self.cached_get(HEALTH_PATH)
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if "status" in data and data["status"] == "healthy":
                     self.log_result("Health Check", True, f"Status: {data['status']}")
                 else:
@@ -102,12 +475,12 @@ class MaterialReceivingAPITester:
         except Exception as e:
             self.log_result("Health Check", False, f"Exception: {str(e)}")
     
-    def test_root_endpoint(self):
+    async def test_root_endpoint(self):
         """Test root API endpoint"""
         try:
-            response = self.session.get(f"{self.base_url}/")
+            response = await self.cached_get(ROOT_PATH)
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if "message" in data:
                     self.log_result("Root Endpoint", True, f"Message: {data['message']}")
                 else:
@@ -117,81 +490,50 @@ class MaterialReceivingAPITester:
         except Exception as e:
             self.log_result("Root Endpoint", False, f"Exception: {str(e)}")
     
-    def test_create_material_inspection_new_fields(self):
-        """Test creating material inspections with new field structure"""
-        
-        # Test 1: Create material without quantityReceived (should work)
+    async def test_create_positive_cases(self):
+        """Create every valid new-field case in one bulk-sync, then check each stored record"""
         try:
-            material_data = self.create_test_material_data("optional_quantity")
-            response = self.session.post(
-                f"{self.base_url}/material-inspections",
-                json=material_data,
-                headers={"Content-Type": "application/json"}
-            )
+            now = datetime.utcnow().isoformat()
+            positives = []
+            for case, material_id in zip(POSITIVE_CREATE_CASES, self._gen_ids(len(POSITIVE_CREATE_CASES))):
+                material_data = self.create_test_material_data(case)
+                material_data["id"] = material_id
+                material_data["inspectionDate"] = now
+                material_data["lastModified"] = now
+                positives.append(material_data)
             
-            if response.status_code == 200:
-                data = response.json()
-                if "id" in data and "qualityInspector" in data:
-                    self.test_material_ids.append(data["id"])
-                    self.log_result("Create Material (Optional Quantity)", True, f"ID: {data['id']}")
-                else:
-                    self.log_result("Create Material (Optional Quantity)", False, f"Missing required fields: {data}")
-            else:
-                self.log_result("Create Material (Optional Quantity)", False, f"Status: {response.status_code}, Response: {response.text}")
-        except Exception as e:
-            self.log_result("Create Material (Optional Quantity)", False, f"Exception: {str(e)}")
-        
-        # Test 2: Create material with all inspector fields
-        try:
-            material_data = self.create_test_material_data("with_all_inspectors")
-            response = self.session.post(
-                f"{self.base_url}/material-inspections",
-                json=material_data,
-                headers={"Content-Type": "application/json"}
-            )
+            response = await self.post_json(MATERIALS_BULK_SYNC_PATH, {"materials": positives, "lastSyncTimestamp": now})
             
-            if response.status_code == 200:
-                data = response.json()
-                if ("qualityInspector" in data and "safetyInspector" in data and 
-                    "logisticsInspector" in data):
-                    self.test_material_ids.append(data["id"])
-                    self.log_result("Create Material (All Inspectors)", True, f"ID: {data['id']}")
-                else:
-                    self.log_result("Create Material (All Inspectors)", False, f"Inspector fields missing: {data}")
-            else:
-                self.log_result("Create Material (All Inspectors)", False, f"Status: {response.status_code}, Response: {response.text}")
-        except Exception as e:
-            self.log_result("Create Material (All Inspectors)", False, f"Exception: {str(e)}")
-        
-        # Test 3: Create material with only qualityInspector (should work)
-        try:
-            material_data = self.create_test_material_data("only_quality_inspector")
-            response = self.session.post(
-                f"{self.base_url}/material-inspections",
-                json=material_data,
-                headers={"Content-Type": "application/json"}
-            )
+            if response.status_code != 200:
+                for label, _, _ in POSITIVE_CREATE_CASES.values():
+                    self.log_result(label, False, f"Status: {response.status_code}, Response: {self._trunc_body(response)}")
+                return
             
-            if response.status_code == 200:
-                data = response.json()
-                if "qualityInspector" in data and data["qualityInspector"] == "John Smith":
-                    self.test_material_ids.append(data["id"])
-                    self.log_result("Create Material (Quality Inspector Only)", True, f"ID: {data['id']}")
+            # bulk-sync only reports a count, so read the records back to check their fields.
+            # None of the checks look at photos, so skip pulling their base64 out of GridFS.
+            ids = [material["id"] for material in positives]
+            self.test_material_ids.extend(ids)
+            responses = await asyncio.gather(*(
+                self.request("GET", f"{MATERIALS_PATH}/{material_id}?expand_photos=false") for material_id in ids
+            ))
+            for (label, check, problem), material_id, detail in zip(POSITIVE_CREATE_CASES.values(), ids, responses):
+                if detail.status_code == 200:
+                    data = orjson.loads(detail.content)
+                    if check(data):
+                        self.log_result(label, True, f"ID: {material_id}")
+                    else:
+                        self.log_result(label, False, f"{problem}: {data}")
                 else:
-                    self.log_result("Create Material (Quality Inspector Only)", False, f"Quality inspector not set: {data}")
-            else:
-                self.log_result("Create Material (Quality Inspector Only)", False, f"Status: {response.status_code}, Response: {response.text}")
+                    self.log_result(label, False, f"Status: {detail.status_code}, Response: {self._trunc_body(detail)}")
         except Exception as e:
-            self.log_result("Create Material (Quality Inspector Only)", False, f"Exception: {str(e)}")
-        
-        # Test 4: Test validation - missing qualityInspector (should fail)
+            for label, _, _ in POSITIVE_CREATE_CASES.values():
+                self.log_result(label, False, f"Exception: {str(e)}")
+    
+    async def test_create_missing_quality_inspector(self):
+        """Test validation - missing qualityInspector (should fail)"""
         try:
             material_data = self.create_test_material_data("missing_quality_inspector")
-            response = self.session.post(
-                f"{self.base_url}/material-inspections",
-                json=material_data,
-                headers={"Content-Type": "application/json"}
-            )
+            response = await self.post_json(MATERIALS_PATH, material_data)
             
             if response.status_code in [400, 422]:  # Should fail validation
                 self.log_result("Create Material (Missing Quality Inspector)", True, "Properly rejected missing qualityInspector")
@@ -199,68 +541,54 @@ class MaterialReceivingAPITester:
                 self.log_result("Create Material (Missing Quality Inspector)", False, f"Should have failed validation, got: {response.status_code}")
         except Exception as e:
             self.log_result("Create Material (Missing Quality Inspector)", False, f"Exception: {str(e)}")
-        
-        # Test 5: Test with empty optional inspector
-        try:
-            material_data = self.create_test_material_data("empty_optional_inspector")
-            response = self.session.post(
-                f"{self.base_url}/material-inspections",
-                json=material_data,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "qualityInspector" in data and "safetyInspector" in data:
-                    self.test_material_ids.append(data["id"])
-                    self.log_result("Create Material (Empty Optional Inspector)", True, f"ID: {data['id']}")
-                else:
-                    self.log_result("Create Material (Empty Optional Inspector)", False, f"Inspector fields issue: {data}")
-            else:
-                self.log_result("Create Material (Empty Optional Inspector)", False, f"Status: {response.status_code}, Response: {response.text}")
-        except Exception as e:
-            self.log_result("Create Material (Empty Optional Inspector)", False, f"Exception: {str(e)}")
     
-    def test_get_material_inspections(self):
+    async def test_create_material_inspection_new_fields(self):
+        """Test creating material inspections with new field structure"""
+        # The negative case needs its own POST so the 422 is observed; it overlaps the bulk create
+        await asyncio.gather(
+            self.test_create_positive_cases(),
+            self.test_create_missing_quality_inspector()
+        )
+    
+    async def test_get_material_inspections(self):
         """Test getting all material inspections with pagination"""
         try:
             # Test basic get all
-            response = self.session.get(f"{self.base_url}/material-inspections")
+            # Only the item count is checked, so stream and count instead of parsing every record
+            response, count = await self.count_list_items(MATERIALS_PATH)
             if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, list):
-                    self.log_result("Get All Materials", True, f"Retrieved {len(data)} inspections")
+                if count is not None:
+                    self.log_result("Get All Materials", True, f"Retrieved {count} inspections")
                 else:
-                    self.log_result("Get All Materials", False, f"Expected list, got: {type(data)}")
+                    self.log_result("Get All Materials", False, f"Expected list, got: {self._trunc_body(response)}")
             else:
                 self.log_result("Get All Materials", False, f"Status: {response.status_code}")
             
             # Test pagination
-            response = self.session.get(f"{self.base_url}/material-inspections?skip=0&limit=1")
+            response, count = await self.count_list_items(MATERIALS_PATH + "?skip=0&limit=1")
             if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, list) and len(data) <= 1:
-                    self.log_result("Get Materials (Pagination)", True, f"Pagination working, got {len(data)} items")
+                if count is not None and count <= 1:
+                    self.log_result("Get Materials (Pagination)", True, f"Pagination working, got {count} items")
                 else:
-                    self.log_result("Get Materials (Pagination)", False, f"Pagination failed: {len(data)} items")
+                    self.log_result("Get Materials (Pagination)", False, f"Pagination failed: {count} items")
             else:
                 self.log_result("Get Materials (Pagination)", False, f"Status: {response.status_code}")
                 
         except Exception as e:
             self.log_result("Get All Materials", False, f"Exception: {str(e)}")
     
-    def test_get_specific_material(self):
+    async def test_get_specific_material(self, material_id):
         """Test getting specific material inspection by ID"""
-        if not self.test_material_ids:
+        if material_id is None:
             self.log_result("Get Specific Material", False, "No test material IDs available")
             return
         
         try:
-            material_id = self.test_material_ids[0]
-            response = self.session.get(f"{self.base_url}/material-inspections/{material_id}")
+            # Only the ID is asserted, so don't have the server inline the photo payloads
+            response = await self.request("GET", f"{MATERIALS_PATH}/{material_id}?expand_photos=false")
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if data.get("id") == material_id:
                     self.log_result("Get Specific Material", True, f"Retrieved material {material_id}")
                 else:
@@ -272,8 +600,8 @@ class MaterialReceivingAPITester:
         
         # Test non-existent material
         try:
-            fake_id = str(uuid.uuid4())
-            response = self.session.get(f"{self.base_url}/material-inspections/{fake_id}")
+            fake_id = uuid.uuid4().hex
+            response = await self.request("GET", f"{MATERIALS_PATH}/{fake_id}")
             if response.status_code == 404:
                 self.log_result("Get Non-existent Material", True, "Properly returned 404")
             else:
@@ -281,14 +609,13 @@ class MaterialReceivingAPITester:
         except Exception as e:
             self.log_result("Get Non-existent Material", False, f"Exception: {str(e)}")
     
-    def test_update_material_inspection(self):
+    async def test_update_material_inspection(self, material_id):
         """Test updating material inspection with new fields"""
-        if not self.test_material_ids:
+        if material_id is None:
             self.log_result("Update Material", False, "No test material IDs available")
             return
         
         try:
-            material_id = self.test_material_ids[0]
             update_data = {
                 "notes": "Updated notes - test modification",
                 "safetyInspector": "Updated Safety Inspector",
@@ -296,31 +623,27 @@ class MaterialReceivingAPITester:
                 "quantityReceived": "200"
             }
             
-            response = self.session.put(
-                f"{self.base_url}/material-inspections/{material_id}",
-                json=update_data,
-                headers={"Content-Type": "application/json"}
-            )
+            response = await self.put_json(f"{MATERIALS_PATH}/{material_id}", update_data)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if (data.get("notes") == update_data["notes"] and 
                     data.get("safetyInspector") == update_data["safetyInspector"]):
                     self.log_result("Update Material", True, f"Successfully updated material {material_id}")
                 else:
                     self.log_result("Update Material", False, f"Update not reflected: {data}")
             else:
-                self.log_result("Update Material", False, f"Status: {response.status_code}, Response: {response.text}")
+                self.log_result("Update Material", False, f"Status: {response.status_code}, Response: {self._trunc_body(response)}")
         except Exception as e:
             self.log_result("Update Material", False, f"Exception: {str(e)}")
     
-    def test_dashboard_stats(self):
+    async def test_dashboard_stats(self):
         """Test dashboard statistics endpoint"""
         try:
-            response = self.session.get(f"{self.base_url}/material-inspections/stats/dashboard")
+            response = await self.cached_get(MATERIALS_STATS_PATH)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 required_fields = ["totalInspections", "compliantCount", "nonCompliantCount", "complianceRate"]
                 
                 if all(field in data for field in required_fields):
@@ -333,32 +656,33 @@ class MaterialReceivingAPITester:
         except Exception as e:
             self.log_result("Dashboard Stats", False, f"Exception: {str(e)}")
     
-    def test_bulk_sync_materials(self):
+    async def test_bulk_sync_materials(self):
         """Test bulk sync functionality for materials"""
         try:
-            # Create multiple material inspections for bulk sync
+            # Create multiple material inspections for bulk sync, all sharing one pre-encoded photo
+            photos_json = orjson.dumps(self.create_sample_photo_data())
+            now = datetime.utcnow().isoformat()
             bulk_materials = []
-            for i in range(3):
+            for i, material_id in enumerate(self._gen_ids(3)):
                 material_data = self.create_test_material_data("with_all_inspectors")
-                material_data["id"] = str(uuid.uuid4())
+                material_data["id"] = material_id
                 material_data["invoiceNumber"] = f"MAT-BULK-{i+1}"
-                material_data["inspectionDate"] = datetime.utcnow().isoformat()
-                material_data["lastModified"] = datetime.utcnow().isoformat()
+                material_data["inspectionDate"] = now
+                material_data["lastModified"] = now
                 bulk_materials.append(material_data)
             
-            sync_data = {
-                "materials": bulk_materials,
-                "lastSyncTimestamp": datetime.utcnow().isoformat()
-            }
-            
-            response = self.session.post(
-                f"{self.base_url}/material-inspections/bulk-sync",
-                json=sync_data,
-                headers={"Content-Type": "application/json"}
+            body = (
+                b'{"materials":['
+                + b",".join(self.build_material_json(material, photos_json) for material in bulk_materials)
+                + b'],"lastSyncTimestamp":'
+                + orjson.dumps(now)
+                + b"}"
             )
             
+            response = await self.post_json(MATERIALS_BULK_SYNC_PATH, body)
+            
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if data.get("synced_count") == 3:
                     # Store IDs for cleanup
                     self.test_material_ids.extend([material["id"] for material in bulk_materials])
@@ -366,53 +690,48 @@ class MaterialReceivingAPITester:
                 else:
                     self.log_result("Bulk Sync Materials", False, f"Expected 3 synced, got: {data.get('synced_count')}")
             else:
-                self.log_result("Bulk Sync Materials", False, f"Status: {response.status_code}, Response: {response.text}")
+                self.log_result("Bulk Sync Materials", False, f"Status: {response.status_code}, Response: {self._trunc_body(response)}")
         except Exception as e:
             self.log_result("Bulk Sync Materials", False, f"Exception: {str(e)}")
     
-    def test_backward_compatibility(self):
-        """Test backward compatibility with cargo-inspection endpoints"""
-        
-        # Test 1: Create via cargo endpoint (should work)
+    async def test_backward_compatibility_create(self):
+        """Create via cargo endpoint (should work)"""
         try:
             material_data = self.create_test_material_data("with_all_inspectors")
-            response = self.session.post(
-                f"{self.base_url}/cargo-inspections",
-                json=material_data,
-                headers={"Content-Type": "application/json"}
-            )
+            response = await self.post_json(CARGO_PATH, material_data)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if "id" in data and "qualityInspector" in data:
                     self.test_material_ids.append(data["id"])
                     self.log_result("Backward Compatibility (Create)", True, f"Cargo endpoint works, ID: {data['id']}")
                 else:
                     self.log_result("Backward Compatibility (Create)", False, f"Missing fields: {data}")
             else:
-                self.log_result("Backward Compatibility (Create)", False, f"Status: {response.status_code}, Response: {response.text}")
+                self.log_result("Backward Compatibility (Create)", False, f"Status: {response.status_code}, Response: {self._trunc_body(response)}")
         except Exception as e:
             self.log_result("Backward Compatibility (Create)", False, f"Exception: {str(e)}")
-        
-        # Test 2: Get via cargo endpoint
+    
+    async def test_backward_compatibility_get(self):
+        """Get via cargo endpoint"""
         try:
-            response = self.session.get(f"{self.base_url}/cargo-inspections")
+            response, count = await self.count_list_items(CARGO_PATH)
             if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, list):
-                    self.log_result("Backward Compatibility (Get)", True, f"Cargo endpoint retrieved {len(data)} items")
+                if count is not None:
+                    self.log_result("Backward Compatibility (Get)", True, f"Cargo endpoint retrieved {count} items")
                 else:
-                    self.log_result("Backward Compatibility (Get)", False, f"Expected list, got: {type(data)}")
+                    self.log_result("Backward Compatibility (Get)", False, f"Expected list, got: {self._trunc_body(response)}")
             else:
                 self.log_result("Backward Compatibility (Get)", False, f"Status: {response.status_code}")
         except Exception as e:
             self.log_result("Backward Compatibility (Get)", False, f"Exception: {str(e)}")
-        
-        # Test 3: Dashboard stats via cargo endpoint
+    
+    async def test_backward_compatibility_stats(self):
+        """Dashboard stats via cargo endpoint"""
         try:
-            response = self.session.get(f"{self.base_url}/cargo-inspections/stats/dashboard")
+            response = await self.cached_get(CARGO_STATS_PATH)
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if "totalInspections" in data:
                     self.log_result("Backward Compatibility (Stats)", True, f"Cargo stats endpoint works")
                 else:
@@ -422,44 +741,118 @@ class MaterialReceivingAPITester:
         except Exception as e:
             self.log_result("Backward Compatibility (Stats)", False, f"Exception: {str(e)}")
     
-    def test_date_handling(self):
+    async def test_backward_compatibility(self):
+        """Test backward compatibility with cargo-inspection endpoints (independent checks run concurrently)"""
+        await asyncio.gather(
+            self.test_backward_compatibility_create(),
+            self.test_backward_compatibility_get(),
+            self.test_backward_compatibility_stats()
+        )
+    
+    async def test_date_handling(self):
         """Test date handling and formatting"""
         try:
             material_data = self.create_test_material_data("standard")
             # Test with dd/mm/yyyy format
             material_data["receiveDate"] = "18/01/2025"
             
-            response = self.session.post(
-                f"{self.base_url}/material-inspections",
-                json=material_data,
-                headers={"Content-Type": "application/json"}
-            )
+            response = await self.post_json(MATERIALS_PATH, material_data)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if "receiveDate" in data:
                     self.test_material_ids.append(data["id"])
                     self.log_result("Date Handling", True, f"Date format accepted: {data.get('receiveDate')}")
                 else:
                     self.log_result("Date Handling", False, f"receiveDate missing: {data}")
             else:
-                self.log_result("Date Handling", False, f"Status: {response.status_code}, Response: {response.text}")
+                self.log_result("Date Handling", False, f"Status: {response.status_code}, Response: {self._trunc_body(response)}")
         except Exception as e:
             self.log_result("Date Handling", False, f"Exception: {str(e)}")
     
-    def test_delete_material_inspection(self):
+    async def test_photo_upload(self):
+        """Test multipart photo upload, the stored reference, downloading it back, and rejections"""
+        material_data = self.create_test_material_data("standard")
+        material_data["photos"] = []
+        try:
+            response = await self.post_json(MATERIALS_PATH, material_data)
+            if response.status_code != 200:
+                self.log_result("Photo Upload", False, f"Setup create failed: {response.status_code}, Response: {self._trunc_body(response)}")
+                return
+            material_id = orjson.loads(response.content)["id"]
+            self.test_material_ids.append(material_id)
+            
+            photo_bytes = base64.b64decode(_SAMPLE_PNG_B64)
+            response = await self.request(
+                "POST",
+                f"{MATERIALS_PATH}/{material_id}/photos",
+                files={"file": ("sample.png", photo_bytes, "image/png")},
+                data={"width": "1", "height": "1"}
+            )
+            if response.status_code != 200:
+                self.log_result("Photo Upload", False, f"Status: {response.status_code}, Response: {self._trunc_body(response)}")
+                return
+            photo = orjson.loads(response.content)
+            if not photo.get("gridfs_id") or photo.get("base64") is not None:
+                self.log_result("Photo Upload", False, f"Expected a GridFS reference only: {photo}")
+                return
+            self.log_result("Photo Upload", True, f"Stored as {photo['gridfs_id']}")
+            
+            # The reference lands on the inspection, and the download serves the exact bytes
+            detail, download = await asyncio.gather(
+                self.request("GET", f"{MATERIALS_PATH}/{material_id}?expand_photos=false"),
+                self.request("GET", f"{PHOTOS_PATH}/{photo['gridfs_id']}")
+            )
+            stored_refs = [p.get("gridfs_id") for p in orjson.loads(detail.content).get("photos", [])] if detail.status_code == 200 else []
+            if photo["gridfs_id"] in stored_refs:
+                self.log_result("Photo Reference On Inspection", True, f"{len(stored_refs)} photo(s) on {material_id}")
+            else:
+                self.log_result("Photo Reference On Inspection", False, f"Status: {detail.status_code}, photos: {stored_refs}")
+            if download.status_code == 200 and download.content == photo_bytes:
+                self.log_result("Photo Download", True, f"{len(download.content)} bytes, {download.headers.get('content-type')}")
+            else:
+                self.log_result("Photo Download", False, f"Status: {download.status_code}, {len(download.content)} bytes")
+        except Exception as e:
+            self.log_result("Photo Upload", False, f"Exception: {str(e)}")
+            return
+        
+        try:
+            unknown, oversized = await asyncio.gather(
+                self.request(
+                    "POST",
+                    f"{MATERIALS_PATH}/{uuid.uuid4().hex}/photos",
+                    files={"file": ("sample.png", photo_bytes, "image/png")}
+                ),
+                self.request(
+                    "POST",
+                    f"{MATERIALS_PATH}/{material_id}/photos",
+                    files={"file": ("large.jpg", bytes(MAX_PHOTO_UPLOAD_BYTES + 1), "image/jpeg")}
+                )
+            )
+            if unknown.status_code == 404:
+                self.log_result("Photo Upload (Unknown Inspection)", True, "Properly returned 404")
+            else:
+                self.log_result("Photo Upload (Unknown Inspection)", False, f"Expected 404, got: {unknown.status_code}")
+            if oversized.status_code == 413:
+                self.log_result("Photo Upload (Over Limit)", True, "Properly returned 413")
+            else:
+                self.log_result("Photo Upload (Over Limit)", False, f"Expected 413, got: {oversized.status_code}")
+        except Exception as e:
+            self.log_result("Photo Upload (Rejections)", False, f"Exception: {str(e)}")
+    
+    async def test_delete_material_inspection(self, material_id):
         """Test deleting material inspection"""
-        if not self.test_material_ids:
+        if material_id is None:
             self.log_result("Delete Material", False, "No test material IDs available")
             return
         
         try:
             # Test deleting existing material
-            material_id = self.test_material_ids.pop()  # Remove from list
-            response = self.session.delete(f"{self.base_url}/material-inspections/{material_id}")
+            response = await self.request("DELETE", f"{MATERIALS_PATH}/{material_id}")
             
             if response.status_code == 200:
-                data = response.json()
+                self.test_material_ids.remove(material_id)  # Nothing left for cleanup to delete
+                data = orjson.loads(response.content)
                 if "message" in data:
                     self.log_result("Delete Material", True, f"Deleted material {material_id}")
                 else:
@@ -468,8 +861,8 @@ class MaterialReceivingAPITester:
                 self.log_result("Delete Material", False, f"Status: {response.status_code}")
             
             # Test deleting non-existent material
-            fake_id = str(uuid.uuid4())
-            response = self.session.delete(f"{self.base_url}/material-inspections/{fake_id}")
+            fake_id = uuid.uuid4().hex
+            response = await self.request("DELETE", f"{MATERIALS_PATH}/{fake_id}")
             if response.status_code == 404:
                 self.log_result("Delete Non-existent Material", True, "Properly returned 404")
             else:
@@ -478,64 +871,133 @@ class MaterialReceivingAPITester:
         except Exception as e:
             self.log_result("Delete Material", False, f"Exception: {str(e)}")
     
-    def cleanup_test_data(self):
+    async def test_load_create(self, count):
+        """Fire count creates from the precanned bodies, LOAD_CONCURRENCY at a time"""
+        limit = asyncio.Semaphore(LOAD_CONCURRENCY)
+        
+        async def create(i):
+            async with limit:
+                return await self.post_json(MATERIALS_PATH, PRECANNED_POSTS[i % len(PRECANNED_POSTS)])
+        
+        try:
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(create(i) for i in range(count)), return_exceptions=True)
+            elapsed = time.perf_counter() - started
+            created = [r for r in responses if isinstance(r, httpx.Response) and r.status_code == 200]
+            self.test_material_ids.extend(orjson.loads(r.content)["id"] for r in created)
+            message = f"{len(created)}/{count} created in {elapsed:.2f}s ({count / elapsed:.1f} req/s)"
+            self.log_result("Load Create", len(created) == count, message)
+        except Exception as e:
+            self.log_result("Load Create", False, f"Exception: {str(e)}")
+    
+    async def cleanup_test_data(self):
         """Clean up test data"""
         print("\n🧹 Cleaning up test data...")
-        for material_id in self.test_material_ids:
-            try:
-                self.session.delete(f"{self.base_url}/material-inspections/{material_id}")
-            except:
-                pass  # Ignore cleanup errors
-    
-    def run_all_tests(self):
-        """Run all backend API tests"""
-        print("🚀 Starting Material Receiving Control Backend API Tests")
-        print(f"🔗 Testing against: {self.base_url}")
-        print("=" * 70)
-        
-        # Basic connectivity tests
-        self.test_health_check()
-        self.test_root_endpoint()
+        if not self.test_material_ids:
+            return
         
-        # New field structure tests
-        self.test_create_material_inspection_new_fields()
-        self.test_get_material_inspections()
-        self.test_get_specific_material()
-        self.test_update_material_inspection()
+        # One round-trip for everything the suite created
+        try:
+            response = await self.post_json(MATERIALS_BULK_DELETE_PATH, {"ids": self.test_material_ids})
+            if response.is_success:
+                return
+            if response.status_code not in (404, 405):  # 404/405 just means no bulk delete route
+                print(f"⚠️  Bulk delete failed ({response.status_code}), deleting one by one")
+        except Exception as e:
+            print(f"⚠️  Bulk delete failed ({e}), deleting one by one")
         
-        # Date handling test
-        self.test_date_handling()
+        # Fall back to one DELETE per ID, at most 16 in flight
+        limit = asyncio.Semaphore(CLEANUP_CONCURRENCY)
         
-        # Advanced features
-        self.test_dashboard_stats()
-        self.test_bulk_sync_materials()
+        async def delete(material_id):
+            async with limit:
+                return await self.request("DELETE", f"{MATERIALS_PATH}/{material_id}")
         
-        # Backward compatibility tests
-        self.test_backward_compatibility()
+        responses = await asyncio.gather(*(delete(material_id) for material_id in self.test_material_ids),
+                                         return_exceptions=True)
+        # 404 means the record is already gone; anything else left test data behind
+        left_behind = [
+            material_id for material_id, response in zip(self.test_material_ids, responses)
+            if isinstance(response, Exception) or not (response.is_success or response.status_code == 404)
+        ]
+        if left_behind:
+            print(f"⚠️  Could not delete {len(left_behind)} test inspections: {', '.join(left_behind)}")
+    
+    async def run_all_tests(self):
+        """Run all backend API tests"""
+        print("🚀 Starting Material Receiving Control Backend API Tests")
+        print(f"🔗 Testing against: {'in-memory mock backend' if self.mock else self.base_url}")
+        print("=" * 70)
         
-        # Cleanup test (delete)
-        self.test_delete_material_inspection()
+        self._batch_ts = datetime.utcnow().isoformat()
         
-        # Final cleanup
-        self.cleanup_test_data()
+        async with self.open_client() as self.client:
+            # Pay DNS + TCP + TLS setup before any test runs; the status of this probe doesn't matter
+            try:
+                await self.client.head(HEALTH_PATH, timeout=5)
+            except Exception:
+                pass
+            
+            # Phase A: nothing here depends on another test's output, so overlap every round-trip
+            await asyncio.gather(
+                self.test_health_check(),
+                self.test_root_endpoint(),
+                self.test_create_material_inspection_new_fields(),
+                self.test_date_handling(),
+                self.test_photo_upload(),
+                self.test_bulk_sync_materials(),
+                self.test_backward_compatibility(),
+                self.test_get_material_inspections(),
+                self.test_dashboard_stats()
+            )
+            self.flush_log()
+            
+            # Phase B: each check gets its own record from phase A, so none can disturb another
+            await asyncio.gather(
+                self.test_update_material_inspection(self.created_id(0)),
+                self.test_get_specific_material(self.created_id(1)),
+                self.test_delete_material_inspection(self.created_id(2))
+            )
+            self.flush_log()
+            
+            if self.load_requests:
+                await self.test_load_create(self.load_requests)
+                self.flush_log()
+            
+            # Final cleanup
+            await self.cleanup_test_data()
         
         # Print summary
         print("\n" + "=" * 70)
         print("📊 TEST SUMMARY")
         print("=" * 70)
-        print(f"✅ Passed: {self.test_results['passed']}")
-        print(f"❌ Failed: {self.test_results['failed']}")
+        print(f"✅ Passed: {self.results.passed}")
+        print(f"❌ Failed: {self.results.failed}")
         
-        if self.test_results['errors']:
+        if self.results.errors:
             print("\n🚨 FAILED TESTS:")
-            for error in self.test_results['errors']:
+            for error in self.results.errors:
                 print(f"   • {error}")
         
-        success_rate = (self.test_results['passed'] / (self.test_results['passed'] + self.test_results['failed'])) * 100
+        success_rate = (self.results.passed / (self.results.passed + self.results.failed)) * 100
         print(f"\n📈 Success Rate: {success_rate:.1f}%")
         
-        return self.test_results
+        if self.results.durations:
+            print("\n⏱️  LATENCY (ms)")
+            for endpoint, samples in sorted(self.results.durations.items()):
+                if len(samples) > 1:
+                    cuts = statistics.quantiles(samples, n=20)
+                    p50, p95 = cuts[9], cuts[18]
+                else:
+                    p50 = p95 = samples[0]
+                print(f"   {endpoint}: n={len(samples)} p50={p50 / 1e6:.1f} p95={p95 / 1e6:.1f}")
+        
+        return self.results
 
 if __name__ == "__main__":
-    tester = MaterialReceivingAPITester()
-    results = tester.run_all_tests()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mock", action="store_true", help="run against an in-memory mock backend")
+    parser.add_argument("--load", type=int, default=0, metavar="N", help="also send N precanned creates as a load stage")
+    args = parser.parse_args()
+    tester = MaterialReceivingAPITester(mock=args.mock, load_requests=args.load)
+    results = asyncio.run(tester.run_all_tests())
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Pytest wiring for backend_test.MaterialReceivingAPITester
+
+Each pytest worker opens one tester (and one event loop) for the whole session.
+Runs use the in-memory MockBackend unless --live is given. Under pytest-xdist each
+worker hands its pass/fail counts back to the controller, which prints the totals.
+"""
+
+import asyncio
+import itertools
+from collections import Counter
+
+import pytest
+
+from backend_test import MaterialReceivingAPITester
+
+
+def pytest_addoption(parser):
+    parser.addoption("--live", action="store_true", help="run against BACKEND_URL instead of the in-memory mock")
+
+
+def pytest_configure(config):
+    # Registered here too so runs without pytest-xdist don't warn about the mark
+    config.addinivalue_line("markers", "xdist_group(name): keep tests on one xdist worker under --dist=loadgroup")
+    config.api_counts = Counter()
+
+
+def pytest_sessionfinish(session):
+    # On an xdist worker, ship this process's counts to the controller
+    if hasattr(session.config, "workeroutput"):
+        session.config.workeroutput["api_counts"] = dict(session.config.api_counts)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    # xdist controller only: fold in a finished worker's counts
+    node.config.api_counts.update(getattr(node, "workeroutput", {}).get("api_counts", {}))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if config.api_counts:
+        terminalreporter.write_line(
+            f"API checks: {config.api_counts['passed']} passed, {config.api_counts['failed']} failed"
+        )
+
+
+class APISession:
+    """A tester bound to the event loop its client was opened on"""
+
+    def __init__(self, tester, loop):
+        self.tester = tester
+        self.loop = loop
+
+    def run(self, method_name, *args):
+        """Run one tester check and fail with the messages of any results it logged as failed"""
+        errors_before = len(self.tester.results.errors)
+        self.loop.run_until_complete(getattr(self.tester, method_name)(*args))
+        self.tester.flush_log()
+        new_errors = list(itertools.islice(self.tester.results.errors, errors_before, None))
+        assert not new_errors, "; ".join(new_errors)
+
+
+@pytest.fixture(scope="session")
+def api(request):
+    loop = asyncio.new_event_loop()
+    tester = MaterialReceivingAPITester(mock=not request.config.getoption("--live"))
+    tester.client = tester.open_client()
+    yield APISession(tester, loop)
+    loop.run_until_complete(tester.cleanup_test_data())
+    loop.run_until_complete(tester.client.aclose())
+    loop.close()
+    request.config.api_counts.update(tester.results.counts)
@@ -0,0 +1,75 @@
+"""
+Backend API checks as individual pytest tests
+
+    pytest -n auto --dist=loadgroup tests/
+
+Read-only checks fan out across xdist workers. Tests that create records or rely
+on those records share the "inspections" group, so they stay on one worker and
+run in file order. Get, update and delete each work on a different created record.
+"""
+
+import pytest
+
+
+def test_health_check(api):
+    api.run("test_health_check")
+
+
+def test_root_endpoint(api):
+    api.run("test_root_endpoint")
+
+
+def test_get_material_inspections(api):
+    api.run("test_get_material_inspections")
+
+
+def test_dashboard_stats(api):
+    api.run("test_dashboard_stats")
+
+
+def test_backward_compatibility_get(api):
+    api.run("test_backward_compatibility_get")
+
+
+def test_backward_compatibility_stats(api):
+    api.run("test_backward_compatibility_stats")
+
+
+@pytest.mark.xdist_group(name="inspections")
+def test_create_material_inspection_new_fields(api):
+    api.run("test_create_material_inspection_new_fields")
+
+
+@pytest.mark.xdist_group(name="inspections")
+def test_date_handling(api):
+    api.run("test_date_handling")
+
+
+@pytest.mark.xdist_group(name="inspections")
+def test_photo_upload(api):
+    api.run("test_photo_upload")
+
+
+@pytest.mark.xdist_group(name="inspections")
+def test_bulk_sync_materials(api):
+    api.run("test_bulk_sync_materials")
+
+
+@pytest.mark.xdist_group(name="inspections")
+def test_backward_compatibility_create(api):
+    api.run("test_backward_compatibility_create")
+
+
+@pytest.mark.xdist_group(name="inspections")
+def test_get_specific_material(api):
+    api.run("test_get_specific_material", api.tester.created_id(1))
+
+
+@pytest.mark.xdist_group(name="inspections")
+def test_update_material_inspection(api):
+    api.run("test_update_material_inspection", api.tester.created_id(0))
+
+
+@pytest.mark.xdist_group(name="inspections")
+def test_delete_material_inspection(api):
+    api.run("test_delete_material_inspection", api.tester.created_id(2))
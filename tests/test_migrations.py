@@ -0,0 +1,75 @@
+"""
+Server data migrations, run against a real MongoDB
+
+Needs MONGO_URL (and the backend requirements); skipped otherwise. Each test works
+in a throwaway database that is dropped afterwards.
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+if not os.environ.get("MONGO_URL"):
+    pytest.skip("MONGO_URL is not set", allow_module_level=True)
+pytest.importorskip("fastapi")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+
+
+def run_in_scratch_db(check):
+    """Run check(db) in a fresh database, dropping it afterwards"""
+    async def runner():
+        client = server.AsyncMongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=2000)
+        db = client[f"migration_test_{uuid.uuid4().hex[:12]}"]
+        try:
+            await check(db)
+        finally:
+            await client.drop_database(db.name)
+            await client.close()
+
+    asyncio.run(runner())
+
+
+def test_legacy_ids_migrate_with_unique_id_index():
+    async def check(db):
+        collection = db.material_inspections
+        await collection.create_index("id", unique=True)
+        await collection.insert_many([
+            {"id": "legacy-1", "invoiceNumber": "MAT-1"},
+            {"id": "legacy-2", "invoiceNumber": "MAT-2"},
+        ])
+
+        await server.migrate_legacy_ids(collection)
+
+        documents = await collection.find({}, sort=[("_id", 1)]).to_list(length=None)
+        assert [(d["_id"], d["invoiceNumber"]) for d in documents] == [("legacy-1", "MAT-1"), ("legacy-2", "MAT-2")]
+        assert all("id" not in d for d in documents)
+        assert "id_1" not in await collection.index_information()
+
+    run_in_scratch_db(check)
+
+
+def test_failed_migration_releases_its_claim():
+    async def check(db):
+        async def failing():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await server.run_migration_once(db, "example", failing)
+        assert await db.migrations.find_one({"_id": "example"}) is None
+
+        ran = []
+
+        async def succeeding():
+            ran.append(True)
+
+        assert await server.run_migration_once(db, "example", succeeding)
+        assert ran
+        assert (await db.migrations.find_one({"_id": "example"}))["completedAt"]
+
+    run_in_scratch_db(check)